@@ -4,7 +4,7 @@ Amplifier Whisper Tool Module
 Speech-to-text transcription using OpenAI's Whisper API.
 """
 
-from .core import Transcript, TranscriptSegment, WhisperTranscriber
+from .core import AudioRef, Transcript, TranscriptSegment, WhisperTranscriber
 from .whisper_tool import WhisperTool
 
-__all__ = ["WhisperTool", "Transcript", "TranscriptSegment", "WhisperTranscriber"]
+__all__ = ["WhisperTool", "AudioRef", "Transcript", "TranscriptSegment", "WhisperTranscriber"]
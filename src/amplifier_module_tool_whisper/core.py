@@ -4,23 +4,84 @@ Whisper Transcriber Core Implementation
 Uses OpenAI Whisper API to transcribe audio files.
 """
 
+import errno
+import hashlib
+import importlib.util
 import logging
 import os
+import struct
+import threading
 import time
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
 logger = logging.getLogger(__name__)
 
-try:
-    from openai import OpenAI
+# openai is imported lazily on first client creation to keep module import fast
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+OpenAI: Any = None
 
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
 
+def _openai_class() -> Any:
+    """Import and return the OpenAI client class on first use."""
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as openai_class
 
-@dataclass
+        OpenAI = openai_class
+    return OpenAI
+
+
+_SEGMENT_HEADER = struct.Struct("<qddI")  # id, start, end, text byte length
+
+MAX_FILE_SIZE = 25 * 1024 * 1024  # 25MB Whisper API upload limit
+COST_PER_MINUTE = 0.006  # USD
+
+# stat() errors that mean "no such file", matching what Path.exists() treats as missing
+MISSING_FILE_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EBADF, errno.ELOOP)
+
+_CLIENT_CACHE: dict[tuple[str, str | None], Any] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def get_shared_client(api_key: str, base_url: str | None = None) -> Any:
+    """Get an OpenAI client shared by all callers with the same key and endpoint.
+
+    Reusing the client reuses its HTTP connection pool, so transcribers created
+    by separate tool instances avoid repeated TCP/TLS handshakes.
+
+    Args:
+        api_key: OpenAI API key
+        base_url: Optional API base URL override
+
+    Returns:
+        Shared OpenAI client
+    """
+    if not OPENAI_AVAILABLE:
+        raise ValueError("openai package not installed. Install with: pip install openai")
+
+    key = (api_key, base_url)
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client = _openai_class()(api_key=api_key, base_url=base_url)
+            _CLIENT_CACHE[key] = client
+    return client
+
+
+@dataclass(frozen=True, slots=True)
+class AudioRef:
+    """Audio file reference carrying pre-fetched stat metadata."""
+
+    path: Path
+    size: int
+    mtime_ns: int
+
+
+@dataclass(slots=True)
 class TranscriptSegment:
     """Individual transcript segment with timing."""
 
@@ -29,6 +90,10 @@ class TranscriptSegment:
     end: float
     text: str
 
+    def to_dict(self) -> dict[str, Any]:
+        """Convert segment to a JSON-serializable dict."""
+        return {"id": self.id, "start": self.start, "end": self.end, "text": self.text}
+
 
 @dataclass
 class Transcript:
@@ -39,30 +104,63 @@ class Transcript:
     duration: float | None = None
     segments: list[TranscriptSegment] = field(default_factory=list)
 
+    def segments_as_dicts(self) -> list[dict[str, Any]]:
+        """Convert all segments to JSON-serializable dicts in a single pass."""
+        return list(map(TranscriptSegment.to_dict, self.segments))
+
+    def content_hash(self) -> str:
+        """Compute a SHA-256 hash of the transcript text and segments.
+
+        Segments are packed into a single buffer and hashed once, so identical
+        transcripts can be detected cheaply.
+
+        Returns:
+            Hex digest of the transcript content
+        """
+        text = self.text.encode("utf-8")
+        buf = bytearray(struct.pack("<I", len(text)))
+        buf += text
+        for seg in self.segments:
+            seg_text = seg.text.encode("utf-8")
+            buf += _SEGMENT_HEADER.pack(seg.id, seg.start, seg.end, len(seg_text))
+            buf += seg_text
+        return hashlib.sha256(buf).hexdigest()
+
 
 class WhisperTranscriber:
     """Transcribe audio using OpenAI Whisper API."""
 
-    def __init__(self, api_key: str | None = None, model: str = "whisper-1"):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "whisper-1",
+        base_url: str | None = None,
+        client: Any | None = None,
+    ):
         """Initialize transcriber.
 
         Args:
             api_key: OpenAI API key (or from OPENAI_API_KEY env)
             model: Whisper model to use
+            base_url: Optional API base URL override
+            client: Optional pre-configured OpenAI client (e.g., from get_shared_client)
         """
-        if not OPENAI_AVAILABLE:
-            raise ValueError("openai package not installed. Install with: pip install openai")
-
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key required (set OPENAI_API_KEY env var)")
 
-        self.client = OpenAI(api_key=self.api_key)
+        if client is None:
+            if not OPENAI_AVAILABLE:
+                raise ValueError("openai package not installed. Install with: pip install openai")
+            if not self.api_key:
+                raise ValueError("OpenAI API key required (set OPENAI_API_KEY env var)")
+            client = _openai_class()(api_key=self.api_key, base_url=base_url)
+
+        self.client = client
         self.model = model
+        self.cost_per_second = COST_PER_MINUTE / 60
 
     def transcribe(
         self,
-        audio_path: Path,
+        audio_path: Path | AudioRef,
         language: str | None = None,
         prompt: str | None = None,
         max_retries: int = 3,
@@ -70,7 +168,7 @@ class WhisperTranscriber:
         """Transcribe audio file.
 
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or an AudioRef whose size is already known
             language: Optional language code (e.g., 'en')
             prompt: Optional prompt to guide transcription
             max_retries: Maximum retry attempts
@@ -81,20 +179,71 @@ class WhisperTranscriber:
         Raises:
             ValueError: If transcription fails
         """
-        audio_path = Path(audio_path).expanduser()
-        if not audio_path.exists():
-            raise ValueError(f"Audio file not found: {audio_path}")
+        if isinstance(audio_path, AudioRef):
+            size = audio_path.size
+            audio_path = audio_path.path
+        else:
+            audio_path = Path(audio_path).expanduser()
+            try:
+                size = audio_path.stat().st_size
+            except OSError as e:
+                if e.errno not in MISSING_FILE_ERRNOS:
+                    raise
+                raise ValueError(f"Audio file not found: {audio_path}") from None
 
-        logger.info(f"Transcribing: {audio_path.name}")
+        logger.info("Transcribing: %s", audio_path.name)
 
-        max_size = 25 * 1024 * 1024  # 25MB
-        if audio_path.stat().st_size > max_size:
-            raise ValueError(f"Audio file too large: {audio_path.stat().st_size / 1024 / 1024:.1f}MB (max 25MB)")
+        if size > MAX_FILE_SIZE:
+            raise ValueError(f"Audio file too large: {size / 1024 / 1024:.1f}MB (max 25MB)")
 
+        return self._transcribe_with_retries(
+            lambda: open(audio_path, "rb"), language=language, prompt=prompt, max_retries=max_retries
+        )
+
+    def transcribe_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        language: str | None = None,
+        prompt: str | None = None,
+        max_retries: int = 3,
+    ) -> Transcript:
+        """Transcribe in-memory audio data.
+
+        Args:
+            data: Raw audio file contents
+            filename: File name used by the API to infer the audio format (e.g., 'audio.mp3')
+            language: Optional language code (e.g., 'en')
+            prompt: Optional prompt to guide transcription
+            max_retries: Maximum retry attempts
+
+        Returns:
+            Transcript object with text and segments
+
+        Raises:
+            ValueError: If transcription fails
+        """
+        logger.info("Transcribing: %s", filename)
+
+        if len(data) > MAX_FILE_SIZE:
+            raise ValueError(f"Audio file too large: {len(data) / 1024 / 1024:.1f}MB (max 25MB)")
+
+        return self._transcribe_with_retries(
+            lambda: nullcontext((filename, data)), language=language, prompt=prompt, max_retries=max_retries
+        )
+
+    def _transcribe_with_retries(
+        self,
+        open_file: Callable[[], AbstractContextManager[Any]],
+        language: str | None,
+        prompt: str | None,
+        max_retries: int,
+    ) -> Transcript:
+        """Call the Whisper API with retries, opening the audio afresh for each attempt."""
         last_error = None
         for attempt in range(max_retries):
             try:
-                with open(audio_path, "rb") as audio_file:
+                with open_file() as audio_file:
                     kwargs = {
                         "model": self.model,
                         "file": audio_file,
@@ -126,14 +275,14 @@ class WhisperTranscriber:
                     segments=segments,
                 )
 
-                logger.info(f"Transcription complete: {len(transcript.text)} chars, {len(segments)} segments")
+                logger.info("Transcription complete: %d chars, %d segments", len(transcript.text), len(segments))
                 return transcript
 
             except Exception as e:
                 last_error = e
                 if attempt < max_retries - 1:
                     wait_time = 2**attempt
-                    logger.warning(f"Attempt {attempt + 1} failed, retrying in {wait_time}s: {e}")
+                    logger.warning("Attempt %d failed, retrying in %ds: %s", attempt + 1, wait_time, e)
                     time.sleep(wait_time)
                     continue
 
@@ -148,6 +297,4 @@ class WhisperTranscriber:
         Returns:
             Estimated cost in USD
         """
-        cost_per_minute = 0.006
-        duration_minutes = duration_seconds / 60
-        return duration_minutes * cost_per_minute
+        return duration_seconds * self.cost_per_second
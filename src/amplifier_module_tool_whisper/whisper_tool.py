@@ -4,20 +4,79 @@ Whisper Tool - Amplifier Tool Protocol Wrapper
 Wraps WhisperTranscriber in Amplifier Tool protocol for use in profiles.
 """
 
+import asyncio
+import hashlib
+import json
 import logging
+import os
+import secrets
+import stat
 from pathlib import Path
 from typing import Any
 
 from amplifier_core.models import ToolResult
 
-from .core import WhisperTranscriber
+from .core import MAX_FILE_SIZE, MISSING_FILE_ERRNOS, OPENAI_AVAILABLE, AudioRef, WhisperTranscriber, get_shared_client
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+SERIALIZERS = ("orjson", "json")
+
+
+def _expand_path(path: str | os.PathLike[str]) -> Path:
+    """Convert to Path, only expanding the user directory when the path starts with ~."""
+    path = Path(path)
+    if path.parts and path.parts[0].startswith("~"):
+        return path.expanduser()
+    return path
+
+
+def _cache_key(audio: AudioRef, model: str, language: str | None, prompt: str | None) -> str:
+    """Compute cache key for a transcription request.
+
+    Uses the file's absolute path, size and modification time rather than
+    hashing its contents, so key computation needs no extra reads.
+    """
+    digest = hashlib.sha256()
+    for part in (os.path.abspath(audio.path), str(audio.size), str(audio.mtime_ns), model, language, prompt):
+        digest.update((part or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _cache_enabled() -> bool:
+    """Check whether the transcript cache is enabled (disable with WHISPER_NO_CACHE=1)."""
+    return os.getenv("WHISPER_NO_CACHE", "") not in ("1", "true", "yes")
+
+
+def _cache_durable() -> bool:
+    """Check whether cache writes should be fsynced (enable with WHISPER_CACHE_DURABLE=1)."""
+    return os.getenv("WHISPER_CACHE_DURABLE", "") in ("1", "true", "yes")
+
+
+def _error_result(message: str, error_type: str = "ValueError") -> ToolResult:
+    """Build a failed ToolResult with the standard error payload."""
+    return ToolResult(success=False, error={"message": message, "type": error_type})
+
 
 class WhisperTool:
     """OpenAI Whisper transcription tool."""
 
+    __slots__ = ("output_dir", "cache_dir", "max_concurrency", "serialize", "transcriber")
+
+    name = "whisper"
+    """Tool name for invocation."""
+
+    description = "Transcribe audio using OpenAI Whisper API"
+    """Human-readable tool description."""
+
     def __init__(self, config: dict[str, Any] | None = None):
         """Initialize Whisper tool.
 
@@ -26,25 +85,31 @@ class WhisperTool:
                 - output_dir: Directory to save transcripts (default: ~/transcripts)
                 - model: Whisper model to use (default: whisper-1)
                 - api_key: OpenAI API key (optional, can use env var)
+                - base_url: OpenAI API base URL override (optional)
+                - max_concurrency: Maximum parallel transcriptions in execute_many (default: 8)
+                - serialize: Return output pre-serialized as a JSON string ("orjson" or "json")
         """
         config = config or {}
-        self.output_dir = Path(config.get("output_dir", "~/transcripts")).expanduser()
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = _expand_path(config.get("output_dir", "~/transcripts"))
+        if not self.output_dir.exists():
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = self.output_dir / "cache"
+        self.max_concurrency = max(1, int(config.get("max_concurrency", 8)))
 
-        model = config.get("model", "whisper-1")
-        api_key = config.get("api_key")
+        self.serialize = config.get("serialize")
+        if self.serialize is not None and self.serialize not in SERIALIZERS:
+            raise ValueError(f"Unsupported serialize option: {self.serialize} (expected one of {SERIALIZERS})")
+        if self.serialize == "orjson" and not ORJSON_AVAILABLE:
+            raise ValueError("orjson package not installed. Install with: pip install orjson")
 
-        self.transcriber = WhisperTranscriber(api_key=api_key, model=model)
+        model = config.get("model", "whisper-1")
+        api_key = config.get("api_key") or os.getenv("OPENAI_API_KEY")
+        base_url = config.get("base_url")
 
-    @property
-    def name(self) -> str:
-        """Tool name for invocation."""
-        return "whisper"
+        # Share one client (and its connection pool) across tool instances
+        client = get_shared_client(api_key, base_url) if api_key and OPENAI_AVAILABLE else None
 
-    @property
-    def description(self) -> str:
-        """Human-readable tool description."""
-        return "Transcribe audio using OpenAI Whisper API"
+        self.transcriber = WhisperTranscriber(api_key=api_key, model=model, base_url=base_url, client=client)
 
     async def execute(self, input: dict[str, Any]) -> ToolResult:
         """Execute Whisper transcription.
@@ -57,49 +122,161 @@ class WhisperTool:
                 - max_retries (optional): Maximum retry attempts (default: 3)
 
         Returns:
-            ToolResult with output containing:
+            ToolResult with output (a JSON string of the same fields when the
+            serialize option is configured) containing:
                 - text: Full transcript text
                 - segments: List of timestamped segments
                 - duration: Audio duration in seconds
                 - language: Detected or specified language
-                - cost: Estimated API cost in USD
+                - cost: Estimated API cost in USD (0.0 when served from cache)
+                - cached: Whether the transcript was served from the local cache
+        """
+        return await asyncio.to_thread(self.execute_sync, input)
+
+    def execute_sync(self, input: dict[str, Any]) -> ToolResult:
+        """Execute Whisper transcription synchronously, without an event loop.
+
+        Intended for CLI and batch scripts; accepts the same input and returns
+        the same ToolResult as execute().
         """
         try:
             audio_path = input.get("audio_path")
             if not audio_path:
-                return ToolResult(success=False, error={"message": "audio_path is required", "type": "ValueError"})
+                return _error_result("audio_path is required")
+            if not isinstance(audio_path, (str, os.PathLike)):
+                return _error_result("audio_path must be str or PathLike", "TypeError")
 
             language = input.get("language")
             prompt = input.get("prompt")
             max_retries = input.get("max_retries", 3)
 
-            audio_path = Path(audio_path).expanduser()
-            logger.info(f"Starting transcription: {audio_path.name}")
+            audio_path = _expand_path(audio_path)
+
+            try:
+                audio_stat = audio_path.stat()
+            except OSError as e:
+                if e.errno not in MISSING_FILE_ERRNOS:
+                    raise
+                return _error_result(f"Audio file not found: {audio_path}")
+            if not stat.S_ISREG(audio_stat.st_mode):
+                return _error_result(f"Audio path is not a file: {audio_path}")
+            if audio_stat.st_size > MAX_FILE_SIZE:
+                return _error_result(f"Audio file too large: {audio_stat.st_size / 1024 / 1024:.1f}MB (max 25MB)")
+
+            audio = AudioRef(path=audio_path, size=audio_stat.st_size, mtime_ns=audio_stat.st_mtime_ns)
+            logger.info("Starting transcription: %s", audio_path.name)
+
+            cache_path = None
+            if _cache_enabled():
+                key = _cache_key(audio, self.transcriber.model, language, prompt)
+                cache_path = self.cache_dir / f"{key}.json"
+                cached = self._read_cache(cache_path)
+                if cached is not None:
+                    logger.info("Transcript cache hit: %s", audio_path.name)
+                    # No API request was made, so this call cost nothing
+                    cached.update(cost=0.0, cached=True)
+                    return ToolResult(
+                        success=True, output=self._dumps(cached).decode("utf-8") if self.serialize else cached
+                    )
 
             transcript = self.transcriber.transcribe(
-                audio_path=audio_path, language=language, prompt=prompt, max_retries=max_retries
+                audio_path=audio, language=language, prompt=prompt, max_retries=max_retries
             )
 
-            cost = 0.0
-            if transcript.duration:
-                cost = self.transcriber.estimate_cost(transcript.duration)
+            cost = transcript.duration * self.transcriber.cost_per_second if transcript.duration else 0.0
 
             output = {
                 "text": transcript.text,
-                "segments": [
-                    {"id": seg.id, "start": seg.start, "end": seg.end, "text": seg.text} for seg in transcript.segments
-                ],
+                "segments": transcript.segments_as_dicts(),
                 "duration": transcript.duration,
                 "language": transcript.language,
                 "cost": cost,
+                "cached": False,
             }
 
-            logger.info(f"Transcription successful: {len(transcript.text)} chars, ${cost:.4f}")
-            return ToolResult(success=True, output=output)
+            # Serialize once and reuse the bytes for both the cache entry and the result.
+            # Only an explicitly requested serialization may fail the call; cache-only
+            # serialization failures just skip the cache write.
+            raw = None
+            if self.serialize:
+                raw = self._dumps(output)
+            elif cache_path is not None:
+                try:
+                    raw = self._dumps(output)
+                except (TypeError, ValueError) as e:
+                    logger.warning("Skipping cache write, output not serializable: %s", e)
+            if cache_path is not None and raw is not None:
+                self._write_cache(cache_path, raw)
+
+            logger.info("Transcription successful: %d chars, $%.4f", len(transcript.text), cost)
+            return ToolResult(success=True, output=raw.decode("utf-8") if self.serialize and raw else output)
 
         except ValueError as e:
-            logger.error(f"Transcription failed: {e}")
-            return ToolResult(success=False, error={"message": str(e), "type": "ValueError"})
+            logger.error("Transcription failed: %s", e)
+            return _error_result(str(e))
         except Exception as e:
-            logger.error(f"Unexpected error during transcription: {e}", exc_info=True)
-            return ToolResult(success=False, error={"message": str(e), "type": type(e).__name__})
+            logger.error("Unexpected error during transcription: %s", e, exc_info=True)
+            return _error_result(str(e), type(e).__name__)
+
+    async def execute_many(self, inputs: list[dict[str, Any]]) -> list[ToolResult]:
+        """Execute multiple Whisper transcriptions concurrently.
+
+        Args:
+            inputs: List of input parameter dicts, each accepted by execute()
+
+        Returns:
+            List of ToolResults in the same order as inputs
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(item: dict[str, Any]) -> ToolResult:
+            async with semaphore:
+                return await self.execute(item)
+
+        results = await asyncio.gather(*(run(item) for item in inputs), return_exceptions=True)
+
+        tool_results = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error("Batch transcription failed: %s", result)
+                result = _error_result(str(result), type(result).__name__)
+            tool_results.append(result)
+        return tool_results
+
+    def _dumps(self, output: dict[str, Any]) -> bytes:
+        """Serialize output to UTF-8 JSON, using orjson only when it was requested."""
+        if self.serialize == "orjson":
+            return orjson.dumps(output)
+        return json.dumps(output).encode("utf-8")
+
+    def _read_cache(self, cache_path: Path) -> dict[str, Any] | None:
+        """Load a cached transcript output, treating missing or corrupt entries as misses."""
+        try:
+            cached = json.loads(cache_path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache entry %s: %s", cache_path.name, e)
+            return None
+
+        if not isinstance(cached, dict) or "text" not in cached or "segments" not in cached:
+            logger.warning("Ignoring unreadable cache entry %s: %s", cache_path.name, "not a transcript object")
+            return None
+        return cached
+
+    def _write_cache(self, cache_path: Path, raw: bytes) -> None:
+        """Atomically write serialized transcript output to the cache (failures are non-fatal)."""
+        # Unique temp name so concurrent writers of the same key never collide; the
+        # rename is atomic, and fsync is skipped unless durability is requested.
+        tmp_path = cache_path.with_suffix(f".{secrets.token_hex(4)}.tmp")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+                if _cache_durable():
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning("Failed to write cache entry %s: %s", cache_path.name, e)
+            tmp_path.unlink(missing_ok=True)
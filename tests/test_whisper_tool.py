@@ -2,12 +2,21 @@
 Tests for WhisperTool
 """
 
+import json
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from amplifier_module_tool_whisper import Transcript, TranscriptSegment, WhisperTool
+from amplifier_module_tool_whisper import AudioRef, Transcript, TranscriptSegment, WhisperTool, core
+
+
+@pytest.fixture(autouse=True)
+def clear_client_cache():
+    """Prevent shared OpenAI clients from leaking between tests."""
+    core._CLIENT_CACHE.clear()
+    yield
+    core._CLIENT_CACHE.clear()
 
 
 @pytest.fixture
@@ -177,3 +186,412 @@ def test_file_size_validation(tmp_path):
 
         with pytest.raises(ValueError, match="too large"):
             tool.transcriber.transcribe(audio_file)
+
+
+@pytest.mark.asyncio
+async def test_execute_cache_hit(whisper_tool, tmp_path):
+    """Test that repeat transcriptions of the same audio are served from cache."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Cached", language="en", duration=5.0, segments=[])
+
+        first = await whisper_tool.execute({"audio_path": str(audio_file)})
+        second = await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        mock_transcribe.assert_called_once()
+        assert second.success is True
+        assert first.output["cached"] is False
+        assert first.output["cost"] > 0
+        assert second.output["cached"] is True
+        assert second.output["cost"] == 0.0
+        assert second.output["text"] == first.output["text"]
+        assert len(list(whisper_tool.cache_dir.glob("*.json"))) == 1
+
+
+@pytest.mark.asyncio
+async def test_execute_cache_keyed_by_options(whisper_tool, tmp_path):
+    """Test that different language/prompt options do not share cache entries."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+        await whisper_tool.execute({"audio_path": str(audio_file), "language": "es"})
+
+        assert mock_transcribe.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_cache_disabled(whisper_tool, tmp_path, monkeypatch):
+    """Test that WHISPER_NO_CACHE=1 bypasses the transcript cache."""
+    monkeypatch.setenv("WHISPER_NO_CACHE", "1")
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        assert mock_transcribe.call_count == 2
+        assert not whisper_tool.cache_dir.exists()
+
+
+@pytest.mark.asyncio
+async def test_execute_corrupt_cache_is_miss(whisper_tool, tmp_path):
+    """Test that unreadable cache entries fall back to transcription."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        cache_file = next(whisper_tool.cache_dir.glob("*.json"))
+        cache_file.write_text("{not json")
+
+        result = await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        assert mock_transcribe.call_count == 2
+        assert result.success is True
+        assert result.output["text"] == "Test"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("entry", ["[]", "{}", '"str"', '{"text": "Test"}'])
+async def test_execute_malformed_cache_is_miss(whisper_tool, tmp_path, entry):
+    """Test that valid JSON cache entries without transcript fields fall back to transcription."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        cache_file = next(whisper_tool.cache_dir.glob("*.json"))
+        cache_file.write_text(entry)
+
+        result = await whisper_tool.execute({"audio_path": str(audio_file)})
+        repeat = await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        assert mock_transcribe.call_count == 2
+        assert result.success is True
+        assert result.output["text"] == "Test"
+        assert result.output["cached"] is False
+        assert repeat.output["cached"] is True
+
+
+@pytest.mark.asyncio
+async def test_execute_many(whisper_tool, tmp_path):
+    """Test batch transcription preserves input order and isolates failures."""
+    audio_files = []
+    for i in range(3):
+        audio_file = tmp_path / f"test{i}.mp3"
+        audio_file.write_bytes(f"fake audio data {i}".encode())
+        audio_files.append(audio_file)
+
+    def fake_transcribe(audio_path, **kwargs):
+        return Transcript(text=audio_path.path.name, language="en", duration=5.0, segments=[])
+
+    with patch.object(whisper_tool.transcriber, "transcribe", side_effect=fake_transcribe):
+        results = await whisper_tool.execute_many(
+            [{"audio_path": str(f)} for f in audio_files] + [{"audio_path": "/nonexistent/file.mp3"}, {}]
+        )
+
+    assert len(results) == 5
+    assert [r.output["text"] for r in results[:3]] == ["test0.mp3", "test1.mp3", "test2.mp3"]
+    assert results[3].success is False
+    assert results[4].success is False
+    assert "audio_path is required" in results[4].error["message"]
+
+
+@pytest.mark.asyncio
+async def test_execute_absolute_path_skips_expansion(whisper_tool, tmp_path):
+    """Test that paths without a leading ~ are not passed through expanduser."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake")
+
+    with (
+        patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe,
+        patch("amplifier_module_tool_whisper.whisper_tool.Path.expanduser") as mock_expand,
+    ):
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+
+        result = await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        mock_expand.assert_not_called()
+        assert mock_transcribe.call_args.kwargs["audio_path"].path == audio_file
+        assert result.success is True
+
+
+def test_transcribe_bytes(mock_openai_response):
+    """Test transcription of in-memory audio data."""
+    with patch("amplifier_module_tool_whisper.core.OpenAI") as mock_openai:
+        mock_openai.return_value.audio.transcriptions.create.return_value = mock_openai_response
+        tool = WhisperTool({"api_key": "test-key"})
+
+        transcript = tool.transcriber.transcribe_bytes(b"fake audio data", "test.mp3", language="en")
+
+        call_kwargs = mock_openai.return_value.audio.transcriptions.create.call_args.kwargs
+        assert call_kwargs["file"] == ("test.mp3", b"fake audio data")
+        assert call_kwargs["language"] == "en"
+        assert transcript.text == "This is a test transcript."
+        assert len(transcript.segments) == 1
+
+
+def test_transcribe_bytes_size_validation():
+    """Test that in-memory audio larger than 25MB is rejected."""
+    with patch("amplifier_module_tool_whisper.core.OpenAI"):
+        tool = WhisperTool({"api_key": "test-key"})
+
+        with pytest.raises(ValueError, match="too large"):
+            tool.transcriber.transcribe_bytes(b"x" * (26 * 1024 * 1024), "large.mp3")
+
+
+def test_transcript_segments_as_dicts():
+    """Test segment conversion to JSON-serializable dicts."""
+    transcript = Transcript(
+        text="Hello world",
+        segments=[
+            TranscriptSegment(id=0, start=0.0, end=1.5, text="Hello"),
+            TranscriptSegment(id=1, start=1.5, end=3.0, text="world"),
+        ],
+    )
+
+    assert transcript.segments_as_dicts() == [
+        {"id": 0, "start": 0.0, "end": 1.5, "text": "Hello"},
+        {"id": 1, "start": 1.5, "end": 3.0, "text": "world"},
+    ]
+    assert not hasattr(transcript.segments[0], "__dict__")
+
+
+@pytest.mark.asyncio
+async def test_execute_rejects_invalid_files_before_transcribing(whisper_tool, tmp_path):
+    """Test that missing, non-file and oversized inputs fail without calling the transcriber."""
+    large_file = tmp_path / "large.mp3"
+    large_file.write_bytes(b"x" * (26 * 1024 * 1024))
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        missing = await whisper_tool.execute({"audio_path": str(tmp_path / "missing.mp3")})
+        not_a_dir = await whisper_tool.execute({"audio_path": str(large_file / "nested.mp3")})
+        directory = await whisper_tool.execute({"audio_path": str(tmp_path)})
+        too_large = await whisper_tool.execute({"audio_path": str(large_file)})
+
+        mock_transcribe.assert_not_called()
+
+    assert "not found" in missing.error["message"]
+    assert "not found" in not_a_dir.error["message"]
+    assert "not a file" in directory.error["message"]
+    assert "too large" in too_large.error["message"]
+    assert all(
+        r.success is False and r.error["type"] == "ValueError" for r in (missing, not_a_dir, directory, too_large)
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("serializer", ["json", "orjson"])
+async def test_execute_serialized_output(tmp_path, serializer):
+    """Test that the serialize option returns output as a JSON string."""
+    if serializer == "orjson":
+        pytest.importorskip("orjson")
+    tool = WhisperTool({"output_dir": str(tmp_path / "transcripts"), "serialize": serializer})
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(
+            text="Test",
+            language="en",
+            duration=5.0,
+            segments=[TranscriptSegment(id=0, start=0.0, end=5.0, text="Test")],
+        )
+
+        result = await tool.execute({"audio_path": str(audio_file)})
+        cached = await tool.execute({"audio_path": str(audio_file)})
+
+    assert result.success is True
+    assert isinstance(result.output, str)
+    assert result.get_serialized_output() == result.output
+    assert json.loads(result.output)["segments"][0]["text"] == "Test"
+    assert json.loads(cached.output) == {**json.loads(result.output), "cost": 0.0, "cached": True}
+    assert next(tool.cache_dir.glob("*.json")).read_text(encoding="utf-8") == result.output
+
+
+def test_invalid_serialize_option(tmp_path):
+    """Test that unknown serialize options are rejected."""
+    with pytest.raises(ValueError, match="Unsupported serialize option"):
+        WhisperTool({"output_dir": str(tmp_path), "serialize": "pickle"})
+
+
+def test_client_shared_across_tools(tmp_path):
+    """Test that tools with the same credentials share one OpenAI client."""
+    with patch("amplifier_module_tool_whisper.core.OpenAI") as mock_openai:
+        mock_openai.side_effect = lambda **kwargs: MagicMock()
+        config = {"output_dir": str(tmp_path), "api_key": "test-key"}
+
+        first = WhisperTool(config)
+        second = WhisperTool(config)
+        other_endpoint = WhisperTool({**config, "base_url": "http://localhost:8000/v1"})
+
+        assert first.transcriber.client is second.transcriber.client
+        assert other_endpoint.transcriber.client is not first.transcriber.client
+        assert mock_openai.call_count == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("durable", ["", "1"])
+async def test_execute_cache_write_fsync(whisper_tool, tmp_path, monkeypatch, durable):
+    """Test that cache writes only fsync when WHISPER_CACHE_DURABLE=1 and leave no temp files."""
+    monkeypatch.setenv("WHISPER_CACHE_DURABLE", durable)
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with (
+        patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe,
+        patch("amplifier_module_tool_whisper.whisper_tool.os.fsync") as mock_fsync,
+    ):
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+    assert mock_fsync.called is bool(durable)
+    assert [p.suffix for p in whisper_tool.cache_dir.iterdir()] == [".json"]
+
+
+def test_transcript_content_hash():
+    """Test that content_hash reflects text and segment timing."""
+
+    def make(end: float) -> Transcript:
+        return Transcript(
+            text="Hello world",
+            language="en",
+            segments=[
+                TranscriptSegment(id=0, start=0.0, end=1.5, text="Hello"),
+                TranscriptSegment(id=1, start=1.5, end=end, text="world"),
+            ],
+        )
+
+    assert make(3.0).content_hash() == make(3.0).content_hash()
+    assert make(3.0).content_hash() != make(3.5).content_hash()
+    assert len(make(3.0).content_hash()) == 64
+
+    # Segment boundaries are part of the hash, not just concatenated text
+    split_a = Transcript(text="ab", segments=[TranscriptSegment(0, 0.0, 1.0, "a"), TranscriptSegment(0, 0.0, 1.0, "b")])
+    split_b = Transcript(text="ab", segments=[TranscriptSegment(0, 0.0, 1.0, "ab"), TranscriptSegment(0, 0.0, 1.0, "")])
+    assert split_a.content_hash() != split_b.content_hash()
+
+
+@pytest.mark.asyncio
+async def test_execute_passes_audio_ref(whisper_tool, tmp_path):
+    """Test that execute() stats the file once and hands size/mtime to the transcriber."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+    audio = mock_transcribe.call_args.kwargs["audio_path"]
+    assert audio == AudioRef(path=audio_file, size=15, mtime_ns=audio_file.stat().st_mtime_ns)
+
+
+@pytest.mark.asyncio
+async def test_execute_cache_invalidated_on_modification(whisper_tool, tmp_path):
+    """Test that changing the audio file's size or mtime misses the cache."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Test", language="en", duration=5.0, segments=[])
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        audio_file.write_bytes(b"different audio data")
+        await whisper_tool.execute({"audio_path": str(audio_file)})
+
+        assert mock_transcribe.call_count == 2
+
+
+def test_transcribe_audio_ref_skips_stat(tmp_path, mock_openai_response):
+    """Test that transcribe() trusts the size carried by an AudioRef."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch("amplifier_module_tool_whisper.core.OpenAI") as mock_openai:
+        mock_openai.return_value.audio.transcriptions.create.return_value = mock_openai_response
+        tool = WhisperTool({"output_dir": str(tmp_path / "transcripts"), "api_key": "test-key"})
+
+        with pytest.raises(ValueError, match="too large"):
+            tool.transcriber.transcribe(AudioRef(path=audio_file, size=26 * 1024 * 1024, mtime_ns=0))
+
+        transcript = tool.transcriber.transcribe(AudioRef(path=audio_file, size=15, mtime_ns=0))
+        assert transcript.text == "This is a test transcript."
+
+
+def test_tool_metadata_is_static():
+    """Test that tool metadata is available without instantiating the tool."""
+    assert WhisperTool.name == "whisper"
+    assert WhisperTool.description == "Transcribe audio using OpenAI Whisper API"
+
+
+def test_execute_sync(whisper_tool, tmp_path):
+    """Test synchronous execution without an event loop."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(text="Sync", language="en", duration=5.0, segments=[])
+
+        result = whisper_tool.execute_sync({"audio_path": str(audio_file)})
+
+    assert result.success is True
+    assert result.output["text"] == "Sync"
+    assert whisper_tool.execute_sync({}).success is False
+
+
+@pytest.mark.asyncio
+async def test_execute_invalid_audio_path_type(whisper_tool):
+    """Test execute() rejects non-path audio_path values without logging a traceback."""
+    with patch("amplifier_module_tool_whisper.whisper_tool.logger") as mock_logger:
+        result = await whisper_tool.execute({"audio_path": 123})
+
+    assert result.success is False
+    assert result.error["type"] == "TypeError"
+    assert "must be str or PathLike" in result.error["message"]
+    mock_logger.error.assert_not_called()
+
+
+@pytest.mark.parametrize("name", ["missing.mp3", "file.mp3/nested.mp3"])
+def test_transcribe_missing_path(tmp_path, name):
+    """Test that transcribe() reports unreachable paths as ValueError."""
+    (tmp_path / "file.mp3").write_bytes(b"fake")
+
+    with patch("amplifier_module_tool_whisper.core.OpenAI"):
+        tool = WhisperTool({"output_dir": str(tmp_path / "transcripts"), "api_key": "test-key"})
+
+        with pytest.raises(ValueError, match="not found"):
+            tool.transcriber.transcribe(tmp_path / name)
+
+
+@pytest.mark.asyncio
+async def test_execute_cache_serialization_failure_is_non_fatal(whisper_tool, tmp_path):
+    """Test that an output the cache cannot encode is still returned, just not cached."""
+    audio_file = tmp_path / "test.mp3"
+    audio_file.write_bytes(b"fake audio data")
+
+    with patch.object(whisper_tool.transcriber, "transcribe") as mock_transcribe:
+        mock_transcribe.return_value = Transcript(
+            text="Test",
+            language="en",
+            duration=5.0,
+            segments=[TranscriptSegment(id=0, start=0.0, end=5.0, text=b"not json")],  # type: ignore[arg-type]
+        )
+
+        result = await whisper_tool.execute({"audio_path": str(audio_file)})
+
+    assert result.success is True
+    assert result.output["text"] == "Test"
+    assert not whisper_tool.cache_dir.exists()